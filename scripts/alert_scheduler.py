@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import sqlite3
+from datetime import date, timedelta
+
+# Due-date alerting engine. Each tick only looks at invoices whose due date
+# crossed a threshold since the previous tick, using the due_date index:
+#
+#   overdue          due_date in [last_tick, today)           -> status re-scored, event
+#   due_soon         due_date in (last_tick + 7, today + 7]   -> event
+#   approval_needed  high-value invoices entering the 3-day window -> event
+#
+# Invoices inserted since the previous tick (id > last_max_id, a PK range
+# scan) are checked against every window, since their due date may already
+# be past a threshold the date ranges have moved beyond.
+#
+# Status/action changes come from extract_ai.apply_business_rules so the
+# scheduler and the extraction pipeline never disagree. Events go to
+# alert_outbox for a notifier to deliver (delivered_at NULL = pending).
+# Date windows move once per day; more frequent ticks only check new invoices.
+
+DUE_SOON_DAYS = 7
+APPROVAL_LEAD_DAYS = 3
+APPROVAL_AMOUNT = 5000
+FIRST_DUE_DATE = date(1900, 1, 1)  # lower bound on the first run; skips blank dates
+TICK_SECONDS = int(os.getenv("ALERT_TICK_SECONDS", "3600"))
+
+#SCHEMA
+
+def ensure_alert_tables(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_due ON invoices (due_date)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alert_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_row_id INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            due_date DATE,
+            vendor TEXT,
+            amount REAL,
+            status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            delivered_at TIMESTAMP,
+            UNIQUE (invoice_row_id, event, due_date)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alert_outbox_pending ON alert_outbox (delivered_at)")
+
+#TICK
+
+def _scan(conn, low, high, low_inclusive=True, high_inclusive=False, min_amount=None):
+    """Unpaid invoices with due_date in the given range (index range scan)."""
+    sql = '''
+        SELECT id, vendor, amount, due_date, status FROM invoices
+        WHERE COALESCE(status, '') != 'Paid'
+    '''
+    params = []
+    if low is not None:
+        sql += f" AND due_date {'>=' if low_inclusive else '>'} ?"
+        params.append(low.isoformat())
+    sql += f" AND due_date {'<=' if high_inclusive else '<'} ?"
+    params.append(high.isoformat())
+    if min_amount is not None:
+        sql += " AND amount > ?"
+        params.append(min_amount)
+    return conn.execute(sql, params).fetchall()
+
+
+def _emit(conn, event, row):
+    row_id, vendor, amount, due_date, status = row
+    cursor = conn.execute('''
+        INSERT OR IGNORE INTO alert_outbox (invoice_row_id, event, due_date, vendor, amount, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (row_id, event, due_date, vendor, amount, status))
+    return cursor.rowcount
+
+
+def _scan_new(conn, last_id: int):
+    """Unpaid invoices inserted after `last_id` (PK range scan)."""
+    return conn.execute('''
+        SELECT id, vendor, amount, due_date, status FROM invoices
+        WHERE id > ? AND COALESCE(status, '') != 'Paid' AND due_date >= ?
+    ''', (last_id, FIRST_DUE_DATE.isoformat())).fetchall()
+
+
+def _set_state(conn, key: str, value: str):
+    conn.execute('''
+        INSERT INTO scheduler_state (key, value) VALUES (?, ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+    ''', (key, value))
+
+
+def _rescore_overdue(conn, invoice, today: date, stats: dict):
+    from extract_ai import apply_business_rules
+
+    row_id, vendor, amount, due_date, status = invoice
+    rescored = apply_business_rules({
+        "Amount": amount, "Due_Date": due_date,
+        "Payment_Status": "Paid" if status == "Paid" else "Unpaid",
+    }, today=today)
+    if rescored["Status"] != status:
+        conn.execute("UPDATE invoices SET status = ?, recommended_action = ? WHERE id = ?",
+                     (rescored["Status"], rescored["Recommended_Action"], row_id))
+        stats["rescored"] += 1
+    stats["events"] += _emit(conn, "overdue", (row_id, vendor, amount, due_date, rescored["Status"]))
+
+
+def tick(conn, today: date = None) -> dict:
+    """Runs one scheduler tick; returns counts of re-scored invoices and events."""
+    today = today or date.today()
+    ensure_alert_tables(conn)
+    windows = [("due_soon", DUE_SOON_DAYS, None), ("approval_needed", APPROVAL_LEAD_DAYS, APPROVAL_AMOUNT)]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        state = dict(conn.execute("SELECT key, value FROM scheduler_state").fetchall())
+        last = date.fromisoformat(state["last_tick"]) if "last_tick" in state else None
+        last_id = int(state.get("last_max_id", 0))
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invoices").fetchone()[0]
+        stats = {"rescored": 0, "events": 0}
+
+        if not last or last < today:
+            # Crossed into overdue since the last tick (everything overdue on the first run)
+            for invoice in _scan(conn, last or FIRST_DUE_DATE, today):
+                _rescore_overdue(conn, invoice, today, stats)
+
+            # Entered the due-soon / approval windows since the last tick
+            for event, days, min_amount in windows:
+                low = max(last + timedelta(days=days), today - timedelta(days=1)) if last else today - timedelta(days=1)
+                for invoice in _scan(conn, low, today + timedelta(days=days), low_inclusive=False,
+                                     high_inclusive=True, min_amount=min_amount):
+                    stats["events"] += _emit(conn, event, invoice)
+            _set_state(conn, "last_tick", today.isoformat())
+
+        # Inserted since the last tick: the date ranges above may have passed them by
+        if last:
+            for invoice in _scan_new(conn, last_id):
+                row_id, vendor, amount, due_date, status = invoice
+                if due_date < today.isoformat():
+                    _rescore_overdue(conn, invoice, today, stats)
+                    continue
+                for event, days, min_amount in windows:
+                    in_window = due_date <= (today + timedelta(days=days)).isoformat()
+                    if in_window and (min_amount is None or (amount or 0) > min_amount):
+                        stats["events"] += _emit(conn, event, invoice)
+
+        _set_state(conn, "last_max_id", str(max_id))
+        conn.commit()
+        return stats
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def pending_alerts(conn, limit: int = 100) -> list:
+    """Undelivered outbox events, oldest first."""
+    ensure_alert_tables(conn)
+    return conn.execute('''
+        SELECT id, invoice_row_id, event, due_date, vendor, amount, status, created_at
+        FROM alert_outbox WHERE delivered_at IS NULL ORDER BY id LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def mark_delivered(conn, alert_ids: list):
+    conn.executemany("UPDATE alert_outbox SET delivered_at = CURRENT_TIMESTAMP WHERE id = ?",
+                     [(i,) for i in alert_ids])
+    conn.commit()
+
+
+def run_forever(db_path: str, interval: int = TICK_SECONDS):
+    print(f"⏰ Alert scheduler running every {interval}s on {db_path}")
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        while True:
+            stats = tick(conn)
+            if stats["rescored"] or stats["events"]:
+                print(f"   🔔 {stats['rescored']} invoices re-scored, {stats['events']} alerts queued")
+            time.sleep(interval)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Usage: python scripts/alert_scheduler.py [--once]
+    from init_db import DB_PATH
+    if "--once" in sys.argv:
+        with sqlite3.connect(DB_PATH, isolation_level=None) as conn:
+            print(tick(conn))
+    else:
+        run_forever(DB_PATH)
@@ -8,11 +8,13 @@ import sys
 import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-try:
-    from extract_ai import analyze_invoice_file, save_to_db
-except ImportError:
-    analyze_invoice_file = None
-    save_to_db = None
+
+# Only stdlib + sqlite helpers at import time. The extraction pipeline and
+# pyarrow are imported when an upload or Parquet download actually happens.
+from init_db import DB_PATH, ensure_schema
+from rollups import vendor_spend, status_summary, due_buckets
+from search_index import search_invoices, suggest_vendors
+import frame_cache
 
 # ═══════════════════════════════════════════════════════════════
 # PAGE CONFIGURATION
@@ -187,35 +189,52 @@ st.markdown("""
 # ═══════════════════════════════════════════════════════════════
 # DATA LOADING
 # ═══════════════════════════════════════════════════════════════
-@st.cache_data(ttl=5)
-def load_data():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    root_dir = os.path.dirname(current_dir)
-    db_path = os.path.join(root_dir, "invoices.db")
-    
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
-    
+def load_data(view="ledger"):
+    """Shared, compact invoice frame for a view (see frame_cache.py); read-only"""
     try:
-        conn = sqlite3.connect(db_path)
-        df = pd.read_sql_query("SELECT * FROM invoices", conn)
-        conn.close()
-        
-        df = df.rename(columns={
-            "invoice_id": "Invoice ID", "vendor": "Vendor", "amount": "Amount",
-            "issue_date": "Issue Date", "due_date": "Due Date", "status": "Status",
-            "recommended_action": "Recommended Action", "items": "Items", "location": "Store Location"
-        })
-        
-        if "Issue Date" in df.columns: df["Issue Date"] = pd.to_datetime(df["Issue Date"], errors='coerce')
-        if "Recommended Action" not in df.columns: df["Recommended Action"] = "Review pending"
-            
-        return df
+        return frame_cache.load_view(DB_PATH, view)
     except Exception as e:
         st.error(f"Database Error: {e}")
         return pd.DataFrame()
 
+@st.cache_data(ttl=5)
+def load_rollups():
+    """Pre-aggregated vendor spend, status totals and due buckets (see rollups.py)"""
+    # ensure_schema() also backfills rollups / search index on older databases
+    empty = (pd.DataFrame(columns=["Vendor", "Count", "Amount"]), pd.DataFrame(columns=["Status", "Count", "Amount"]),
+             pd.DataFrame(columns=["Due", "Count", "Amount"]))
+    if not os.path.exists(DB_PATH):
+        return empty
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            ensure_schema(conn)
+            vendors = pd.DataFrame(vendor_spend(conn), columns=["Vendor", "Count", "Amount"])
+            statuses = pd.DataFrame(status_summary(conn), columns=["Status", "Count", "Amount"])
+            due = pd.DataFrame(due_buckets(conn), columns=["Due", "Count", "Amount"])
+        return vendors, statuses, due
+    except Exception as e:
+        st.error(f"Database Error: {e}")
+        return empty
+
+@st.cache_data(ttl=5)
+def search_ledger(query):
+    """Ranked invoice row ids from the FTS5 index (see search_index.py)"""
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            return search_invoices(conn, query, limit=500)
+    except sqlite3.Error:
+        return []
+
+@st.cache_data(ttl=5)
+def lookup_vendors(prefix):
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            return suggest_vendors(conn, prefix)
+    except sqlite3.Error:
+        return []
+
 df = load_data()
+vendor_sum, status_counts, due_sum = load_rollups()
 
 # ═══════════════════════════════════════════════════════════════
 # HEADER
@@ -251,6 +270,10 @@ with st.expander("📤  Upload Invoices (Batch Processing)", expanded=True):
     with c2:
         if uploaded_files:
             if st.button(f"⚡ Process {len(uploaded_files)} Files", key="process_btn"):
+                try:
+                    from extract_ai import analyze_invoice_file, save_to_db
+                except ImportError:
+                    analyze_invoice_file = None
                 progress = st.progress(0)
                 status = st.empty()
                 for i, file in enumerate(uploaded_files):
@@ -268,6 +291,7 @@ with st.expander("📤  Upload Invoices (Batch Processing)", expanded=True):
                 status.success("✅ Batch Complete!")
                 time.sleep(1)
                 st.cache_data.clear()
+                frame_cache.clear()
                 st.rerun()
         else:
             st.markdown("""
@@ -289,10 +313,12 @@ if df.empty:
 
 st.markdown("### 🚀 Operational Overview")
 
-total_inv = len(df)
-total_amt = df["Amount"].sum()
-paid_inv = len(df[df["Status"] == "Paid"])
-pending_amt = df[df["Status"] == "Pending"]["Amount"].sum()
+status_totals = status_counts.set_index("Status")
+total_inv = int(status_counts["Count"].sum())
+total_amt = status_counts["Amount"].sum()
+paid_inv = int(status_totals["Count"].get("Paid", 0))
+pending_inv = int(status_totals["Count"].get("Pending", 0))
+pending_amt = status_totals["Amount"].get("Pending", 0.0)
 time_saved = (total_inv * 9.5) / 60
 
 k1, k2, k3, k4, k5 = st.columns(5)
@@ -323,7 +349,7 @@ def kpi_box(col, title, val, sub, color, is_live=False):
 kpi_box(k1, "Total Invoices", f"{total_inv}", "🔼 100% Automated", "#3B82F6")
 kpi_box(k2, "Total Spend", f"AED {total_amt:,.0f}", "Live Data", "#61D29A", is_live=True)
 kpi_box(k3, "Paid Count", f"{paid_inv}", "Processing", "#61D29A")
-kpi_box(k4, "Pending Value", f"AED {pending_amt:,.0f}", f"{len(df[df['Status']=='Pending'])} Invoices", "#F59E0B")
+kpi_box(k4, "Pending Value", f"AED {pending_amt:,.0f}", f"{pending_inv} Invoices", "#F59E0B")
 kpi_box(k5, "Time Saved", f"{time_saved:.1f} Hrs", "⚡ 95% Efficiency", "#EF4444")
 
 # ═══════════════════════════════════════════════════════════════
@@ -337,8 +363,6 @@ with c_charts:
     with st.container(border=True):
         st.markdown('<h4 style="color:#61D29A !important;">💸 Spend Analysis</h4>', unsafe_allow_html=True)
         
-        vendor_sum = df.groupby("Vendor")["Amount"].sum().reset_index().sort_values("Amount", ascending=True)
-        
         fig_bar = px.bar(
             vendor_sum, 
             x="Amount", 
@@ -359,10 +383,9 @@ with c_charts:
         st.markdown("---")
         st.markdown('<h4 style="color:#61D29A !important;">📊 Invoice Status</h4>', unsafe_allow_html=True)
         
-        status_counts = df["Status"].value_counts().reset_index()
-        status_counts.columns = ["Status", "Count"]
         color_map = {"Paid": "#61D29A", "Pending": "#F59E0B", "Overdue": "#EF4444"}
         
+        status_counts = status_counts[status_counts["Status"] != ""]
         fig_pie = px.pie(status_counts, values="Count", names="Status", hole=0.5)
         fig_pie.update_traces(
             marker=dict(colors=[color_map.get(x, '#882ECA') for x in status_counts["Status"]]),
@@ -375,12 +398,34 @@ with c_charts:
         )
         st.plotly_chart(fig_pie, use_container_width=True, key="status_chart")
 
+        st.markdown("---")
+        st.markdown('<h4 style="color:#61D29A !important;">📅 Upcoming Payments</h4>', unsafe_allow_html=True)
+
+        due_colors = {"Overdue": "#EF4444", "Due in 7 Days": "#F59E0B", "Due in 30 Days": "#882ECA",
+                      "Later": "#61D29A", "No Due Date": "#64748B"}
+        fig_due = px.bar(
+            due_sum,
+            x="Due",
+            y="Amount",
+            text="Count",
+            color="Due",
+            color_discrete_map=due_colors
+        )
+        fig_due.update_traces(textposition="outside", texttemplate="%{text} inv")
+        fig_due.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white'), margin=dict(l=0, r=0, t=20, b=0),
+            height=220, showlegend=False, xaxis_title=None, yaxis_title="AED"
+        )
+        st.plotly_chart(fig_due, use_container_width=True, key="due_chart")
+
 # --- SMART ACTIONS ---
 with c_actions:
     with st.container(height=718, border=True):
         st.markdown('<h4 style="color:#EF4444 !important;">⚡ Action Queue</h4>', unsafe_allow_html=True)
         
-        urgent = df[df["Recommended Action"].str.contains("Urgent|Overdue", case=False, na=False)]
+        # Status is kept current by alert_scheduler.py, so no string matching is needed
+        urgent = df[df["Status"] == "Overdue"]
         routine = df[~df.index.isin(urgent.index)]
         
         if not urgent.empty:
@@ -408,20 +453,48 @@ with c_actions:
 
 st.markdown("### 📑 Detailed Ledger")
 
+s_col1, s_col2 = st.columns([2, 1])
+with s_col1: search_query = st.text_input("🔎 Search Invoices", placeholder="Vendor, invoice ID, location or item...")
+with s_col2: vendor_query = st.text_input("Vendor Lookup", placeholder="Start typing a vendor name...")
+
 f_col1, f_col2, f_col3 = st.columns(3)
-with f_col1: vendor_filter = st.multiselect("Filter Vendor", df["Vendor"].unique(), default=df["Vendor"].unique())
+with f_col1:
+    # Typeahead: only vendors matching the lookup prefix are offered
+    vendor_options = lookup_vendors(vendor_query)
+    vendor_filter = st.multiselect("Filter Vendor", vendor_options, default=vendor_options, disabled=not vendor_query)
 with f_col2: status_filter = st.multiselect("Filter Status", df["Status"].unique(), default=df["Status"].unique())
 with f_col3: 
     if not df.empty:
         min_v, max_v = int(df["Amount"].min()), int(df["Amount"].max())
         val_range = st.slider("Amount Range", min_v, max_v, (min_v, max_v))
 
-filtered_df = df[
-    df["Vendor"].isin(vendor_filter) & 
-    df["Status"].isin(status_filter) & 
-    (df["Amount"].between(val_range[0], val_range[1]))
+# Free-text line items are only loaded when asked for
+show_items = st.toggle("Show Line Items", value=False)
+ledger_df = load_data("ledger_items") if show_items else df
+
+# Suggestions are capped (suggest_vendors), so until the user narrows the
+# selection the ledger is filtered by the typed prefix, not the top matches.
+# vendor_names is COLLATE NOCASE: one suggestion covers every spelling of the name.
+vendor_names = ledger_df["Vendor"].str.lower()
+if not vendor_query:
+    vendor_mask = True
+elif set(vendor_filter) == set(vendor_options):
+    vendor_mask = vendor_names.str.startswith(vendor_query.strip().lower(), na=False)
+else:
+    vendor_mask = vendor_names.isin({v.lower() for v in vendor_filter})
+
+filtered_df = ledger_df[
+    vendor_mask &
+    ledger_df["Status"].isin(status_filter) & 
+    (ledger_df["Amount"].between(val_range[0], val_range[1]))
 ]
 
+if search_query:
+    # Keep FTS5 rank order
+    ranked_ids = search_ledger(search_query)
+    rank = {row_id: i for i, row_id in enumerate(ranked_ids)}
+    filtered_df = filtered_df[filtered_df["id"].isin(rank)].sort_values("id", key=lambda s: s.map(rank))
+
 st.dataframe(
     filtered_df,
     column_config={
@@ -433,12 +506,30 @@ st.dataframe(
     hide_index=True
 )
 
-st.download_button(
-    label="📥 Download Filtered CSV",
-    data=filtered_df.to_csv(index=False).encode('utf-8'),
-    file_name="invoice_export.csv",
-    mime="text/csv"
-)
+d_col1, d_col2 = st.columns([1, 3], vertical_alignment="bottom")
+with d_col1: export_format = st.radio("Export Format", ["CSV", "Parquet"], horizontal=True)
+with d_col2:
+    # Only the selected format is serialized (and pyarrow imported) on each rerun
+    parquet_bytes = None
+    if export_format == "Parquet":
+        try:
+            from parquet_store import parquet_bytes, from_ledger
+        except ImportError:
+            st.warning("Parquet export requires pyarrow; falling back to CSV.")
+    if parquet_bytes:
+        st.download_button(
+            label="📥 Download Filtered Parquet",
+            data=parquet_bytes(from_ledger(filtered_df)),
+            file_name="invoice_export.parquet",
+            mime="application/vnd.apache.parquet"
+        )
+    else:
+        st.download_button(
+            label="📥 Download Filtered CSV",
+            data=filtered_df.to_csv(index=False).encode('utf-8'),
+            file_name="invoice_export.csv",
+            mime="text/csv"
+        )
 
 # ═══════════════════════════════════════════════════════════════
 # FOOTER
@@ -1,34 +1,188 @@
 # scripts/db_insert.py
 
 import os
+import sys
+import time
+import sqlite3
 import pandas as pd
-from sqlalchemy import create_engine
 
-# SQLite database setup
+from init_db import DB_PATH, ensure_schema
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_CSV = os.path.join(BASE_DIR, "extracted_invoices.csv")
+OUTPUT_PARQUET = os.path.join(BASE_DIR, "extracted_invoices.parquet")
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "invoice_ai.db")
-engine = create_engine(f"sqlite:///{DB_PATH}")
+CHUNK_SIZE = 100_000
 
+# Canonical invoices columns (see init_db.py), in insert order
+DB_COLUMNS = [
+    "invoice_id", "vendor", "amount", "issue_date", "due_date",
+    "items", "location", "status", "recommended_action",
+]
 
-# Insert DataFrame into SQL
+# Input column names (extraction CSV/Parquet, dashboard export) -> canonical
+COLUMN_MAP = {
+    "invoice_id": "invoice_id", "invoice id": "invoice_id",
+    "vendor": "vendor",
+    "amount": "amount",
+    "issue_date": "issue_date", "issue date": "issue_date",
+    "due_date": "due_date", "due date": "due_date",
+    "items": "items",
+    "store_location": "location", "store location": "location", "location": "location",
+    "status": "status",
+    "recommended_action": "recommended_action", "recommended action": "recommended_action",
+}
 
-def insert_invoices(df, table_name="invoices"):
+
+# Chunk normalization
+
+def to_db_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Maps input columns onto the canonical schema with SQLite-friendly types."""
+    df = df.rename(columns=lambda c: COLUMN_MAP.get(str(c).strip().lower(), c))
+    df = df.loc[:, ~df.columns.duplicated()]
+    out = pd.DataFrame(index=df.index)
+
+    for col in DB_COLUMNS:
+        if col not in df.columns:
+            out[col] = None
+        elif col == "amount":
+            out[col] = pd.to_numeric(df[col], errors="coerce")
+        elif col in ("issue_date", "due_date"):
+            out[col] = pd.to_datetime(df[col], errors="coerce").dt.strftime("%Y-%m-%d")
+        else:
+            out[col] = df[col].map(lambda v: None if v is None or v != v else str(v))
+
+    # NaN/NaT -> NULL
+    return out.astype(object).where(out.notna(), None)
+
+
+def iter_chunks(path: str, chunk_size: int = CHUNK_SIZE, months=None):
+    """
+    Streams a CSV or Parquet file in DataFrame chunks. `months` ("YYYY-MM"
+    list) limits a Parquet load to those months' row groups.
+    """
+    if str(path).endswith(".parquet"):
+        from parquet_store import iter_parquet_batches
+        yield from iter_parquet_batches(path, batch_size=chunk_size, months=months)
+    else:
+        # Read everything as text: per-chunk type inference turns IDs like
+        # "00123" into 123 (or 1001.0 next to a blank) and breaks the dedupe key.
+        # Amounts and dates are coerced in to_db_frame().
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str)
+
+
+# Bulk insert
+
+def _create_staging(conn):
+    """Per-connection scratch table for one chunk (deduplicated on copy-out)."""
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS staging_invoices (
+            invoice_id TEXT, vendor TEXT, amount REAL, issue_date DATE, due_date DATE,
+            items TEXT, location TEXT, status TEXT, recommended_action TEXT
+        )
+    ''')
+
+
+def _insert_chunk(conn, df: pd.DataFrame) -> int:
     """
-    Insert invoice DataFrame into SQLite table.
-    Creates table if it doesn't exist, appends otherwise.
+    Stages one chunk and copies it into invoices, skipping rows whose
+    (invoice_id, vendor) key is already present. Keys compare with IS
+    semantics (NULL matches NULL) both within the chunk (GROUP BY keeps the
+    first row per key) and against existing rows. Returns rows inserted.
     """
+    cols = ", ".join(DB_COLUMNS)
+    placeholders = ", ".join("?" * len(DB_COLUMNS))
+
+    conn.execute("DELETE FROM staging_invoices")
+    conn.executemany(
+        f"INSERT INTO staging_invoices ({cols}) VALUES ({placeholders})",
+        df[DB_COLUMNS].itertuples(index=False, name=None),
+    )
+    cursor = conn.execute(f'''
+        INSERT INTO invoices ({cols})
+        SELECT {cols} FROM staging_invoices s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM staging_invoices GROUP BY invoice_id, vendor)
+          AND NOT EXISTS (
+            SELECT 1 FROM invoices i
+            WHERE i.invoice_id IS s.invoice_id AND i.vendor IS s.vendor
+        )
+    ''')
+    return cursor.rowcount
+
+
+def bulk_load(path: str, db_path: str = DB_PATH, chunk_size: int = CHUNK_SIZE, months=None) -> int:
+    """
+    Streams a CSV/Parquet file into the canonical invoices table.
+    Each chunk is one transaction; duplicate invoice keys are skipped.
+    """
+    if months and not str(path).endswith(".parquet"):
+        raise ValueError("Month filters need a Parquet input")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    ensure_schema(conn)
+    _create_staging(conn)
+    conn.commit()
+
+    read, inserted = 0, 0
+    start = time.perf_counter()
     try:
-        df.to_sql(table_name, engine, if_exists="append", index=False)
-        print(f"{len(df)} records inserted into '{table_name}' successfully.")
-    except Exception as e:
+        for chunk in iter_chunks(path, chunk_size, months):
+            with conn:
+                inserted += _insert_chunk(conn, to_db_frame(chunk))
+            read += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"   ⏳ {read:,} rows read | {inserted:,} inserted | {read / max(elapsed, 1e-9):,.0f} rows/sec")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Loaded {inserted:,} new records ({read - inserted:,} duplicates skipped) "
+          f"in {elapsed:.1f}s — {read / max(elapsed, 1e-9):,.0f} rows/sec")
+    return inserted
+
+
+def insert_invoices(df, table_name="invoices", db_path=DB_PATH):
+    """
+    Insert an invoice DataFrame into the canonical invoices table.
+    Skips invoices whose (invoice_id, vendor) already exist. Any other
+    `table_name` is appended to as-is, as before.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        if table_name != "invoices":
+            df.to_sql(table_name, conn, if_exists="append", index=False)
+            print(f"{len(df)} records inserted into '{table_name}' successfully.")
+            return
+        ensure_schema(conn)
+        _create_staging(conn)
+        with conn:
+            inserted = _insert_chunk(conn, to_db_frame(df))
+        print(f"{inserted} records inserted into 'invoices' successfully.")
+    except sqlite3.Error as e:
         print("Error inserting into SQLite database:", e)
+    finally:
+        if conn is not None: conn.close()
 
 
 if __name__ == "__main__":
-    # Load extracted invoices CSV
-    csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "extracted_invoices.csv")
-    df = pd.read_csv(csv_path)
+    # Usage: python scripts/db_insert.py [file.csv|file.parquet] [--months 2025-01,2025-02]
+    args = sys.argv[1:]
+    months = None
+    if "--months" in args:
+        i = args.index("--months")
+        months = args[i + 1].split(",") if i + 1 < len(args) else None
+        args = args[:i] + args[i + 2:]
+
+    if args:
+        source = args[0]
+    else:
+        # Prefer the typed Parquet export, fall back to the CSV
+        source = OUTPUT_PARQUET if os.path.exists(OUTPUT_PARQUET) else OUTPUT_CSV
 
-   
-    insert_invoices(df)
+    if not os.path.exists(source):
+        print(f"❌ Input file not found: {source}")
+    else:
+        print(f"📂 Bulk loading {source} -> {DB_PATH}" + (f" (months: {', '.join(months)})" if months else ""))
+        bulk_load(source, months=months)
@@ -1,25 +1,31 @@
 import os
-import json
 import time
 import sqlite3
-import pandas as pd
 from pathlib import Path
-from dotenv import load_dotenv
-from PyPDF2 import PdfReader
 from datetime import datetime, date
+from typing import TYPE_CHECKING
 
-#importing the LLM client
-try:
-    from llm_client import get_llm_client
-except ImportError:
-    get_llm_client = None
+import init_db
 
-load_dotenv()
+from near_dupes import (
+    ensure_near_dupe_index, minhash_signature, find_near_duplicate,
+    register_fingerprint, link_duplicate,
+)
+from prompt_compaction import compact_invoice_text, PAGE_BREAK, OMISSION_MARKER
+from json_repair import INVOICE_JSON_SCHEMA, parse_llm_json, validate_invoice
+from model_router import route_extraction
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Heavy dependencies (pandas, PyPDF2, pyarrow, the OpenAI SDK via llm_client)
+# are imported inside the stage that needs them, so importing this module
+# (dashboard, API, business rules) stays cheap.
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 OUTPUT_CSV = BASE_DIR / "extracted_invoices.csv"
-DB_PATH = BASE_DIR / "invoices.db"
+DB_PATH = Path(init_db.DB_PATH)
 
 MAX_RETRIES = 3
 RETRY_DELAY = 5 
@@ -28,6 +34,10 @@ RETRY_DELAY = 5
 
 def save_to_db(invoice_data: dict):
     if not invoice_data: return
+    if invoice_data.get("Duplicate_Of"):
+        print(f"      🔗 Linked to existing record #{invoice_data['Duplicate_Of']}, not saved again.")
+        return
+    signature = invoice_data.pop("_Fingerprint", None)
     try:
         with sqlite3.connect(str(DB_PATH)) as conn:
             cursor = conn.cursor()
@@ -47,14 +57,51 @@ def save_to_db(invoice_data: dict):
                 invoice_data.get('Status'),
                 invoice_data.get('Recommended_Action')
             ))
+            if signature is not None:
+                ensure_near_dupe_index(conn)
+                register_fingerprint(conn, cursor.lastrowid, signature)
             conn.commit()
             print(f"      💾 Saved {invoice_data.get('Invoice_ID', 'Unknown ID')} to Database.")
     except sqlite3.Error as e:
         print(f"      ❌ Database Error: {e}")
 
+def find_existing_invoice(signature, text: str, source: str):
+    """
+    Looks up a stored invoice whose text near-duplicates this one (re-scan,
+    reminder copy, re-rendered PDF) and whose ID and amount appear in `text`.
+    On a match the file is recorded in invoice_links and the stored record
+    is returned with Duplicate_Of set.
+    """
+    if not DB_PATH.exists(): return None
+    try:
+        with sqlite3.connect(str(DB_PATH)) as conn:
+            ensure_near_dupe_index(conn)
+            match = find_near_duplicate(conn, signature, text)
+            if not match: return None
+            row_id, score = match
+            row = conn.execute('''
+                SELECT invoice_id, vendor, amount, issue_date, due_date,
+                       items, location, status, recommended_action
+                FROM invoices WHERE id = ?
+            ''', (row_id,)).fetchone()
+            if not row: return None
+            link_duplicate(conn, row_id, source, score)
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"      ❌ Database Error: {e}")
+        return None
+
+    keys = ["Invoice_ID", "Vendor", "Amount", "Issue_Date", "Due_Date",
+            "Items", "Store_Location", "Status", "Recommended_Action"]
+    existing = dict(zip(keys, row))
+    existing["Duplicate_Of"] = row_id
+    existing["Similarity"] = score
+    return existing
+
 #PDF UTILITIES
 
 def read_pdf_text(pdf_path: str) -> str:
+    from PyPDF2 import PdfReader
     try:
         reader = PdfReader(pdf_path)
         text = []
@@ -62,20 +109,22 @@ def read_pdf_text(pdf_path: str) -> str:
             page_text = page.extract_text()
             if page_text:
                 text.append(page_text)
-        return "\n".join(text)
+        # Page breaks let the compaction stage spot repeated headers/footers
+        return PAGE_BREAK.join(text)
     except Exception as e:
         print(f"      ❌ Error reading PDF {pdf_path}: {e}")
         return ""
 
 #BUSINESS LOGIC
 
-def apply_business_rules(invoice: dict) -> dict:
+def apply_business_rules(invoice: dict, today: date = None) -> dict:
     """
     Applies deterministic business logic to the extracted data.
+    `today` defaults to the current date (the alert scheduler passes its tick date).
     """
     try:
         # 1. Parse Data
-        today = date.today()
+        today = today or date.today()
         try:
             due_date = datetime.strptime(invoice.get("Due_Date", ""), "%Y-%m-%d").date()
         except (ValueError, TypeError):
@@ -127,14 +176,80 @@ def apply_business_rules(invoice: dict) -> dict:
         return invoice
 
 
+def _extract_with_model(client, model: str, prompt: str, response_format, max_attempts: int = MAX_RETRIES) -> tuple:
+    """
+    Runs the extraction prompt against one model with local JSON repair and
+    validation. Returns (data, validation_errors, usage).
+    """
+    messages = [
+        {"role": "system", "content": "You are a JSON-only extraction bot."},
+        {"role": "user", "content": prompt},
+    ]
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    best = None
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            request = dict(model=model, messages=messages, temperature=0.1)
+            if response_format:
+                request["response_format"] = response_format
+            try:
+                response = client.chat.completions.create(**request)
+            except Exception as e:
+                # Provider/model without JSON mode: fall back to plain prompting
+                if not response_format or "response_format" not in str(e):
+                    raise
+                print("      ⚠️ JSON mode not supported, retrying without it.")
+                response_format = None
+                request.pop("response_format")
+                response = client.chat.completions.create(**request)
+
+            if getattr(response, "usage", None):
+                usage["prompt_tokens"] += response.usage.prompt_tokens or 0
+                usage["completion_tokens"] += response.usage.completion_tokens or 0
+
+            content = response.choices[0].message.content
+            data, errors = validate_invoice(parse_llm_json(content))
+            if not errors:
+                return data, errors, usage
+
+            # Parsed but invalid: keep it as a fallback and only re-ask if retries remain
+            best = (data, errors, usage)
+            print(f"      ⚠️ Validation issues: {'; '.join(errors)}")
+            if attempt == max_attempts:
+                return best
+            messages = messages[:2] + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": "Fix these fields and return the full JSON again: " + "; ".join(errors)},
+            ]
+
+        except Exception as e:
+            if attempt < max_attempts:
+                time.sleep(RETRY_DELAY)
+            elif best is not None:
+                return best
+            else:
+                print(f"      ❌ Failed after {max_attempts} attempts.")
+                raise e
+
+
 def extract_invoice_with_llm(invoice_text: str) -> dict:
     """
     LLM is used STRICTLY for extraction, not decision making.
     """
-    if not get_llm_client: return {}
-    client, model = get_llm_client()
+    try:
+        from llm_client import get_llm_client, get_response_format, get_model_tiers
+        client, model = get_llm_client()
+    except ImportError:
+        return {}
+    response_format = get_response_format(INVOICE_JSON_SCHEMA)
+
+    # Read after llm_client has loaded .env
+    token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "2500"))
+    compact_text, stats = compact_invoice_text(invoice_text, token_budget)
+    print(f"      ✂️ Prompt compacted: ~{stats['tokens_before']:,} -> ~{stats['tokens_after']:,} tokens "
+          f"({stats['tokens_saved']:,} saved)")
 
-    
     prompt = f"""
     You are an AI data extraction assistant. 
     
@@ -150,35 +265,28 @@ def extract_invoice_with_llm(invoice_text: str) -> dict:
     - Issue_Date (YYYY-MM-DD)
     - Due_Date (YYYY-MM-DD)
     - Items (list of strings)
+    - Line_Amounts (list of numbers, the total of each item in the same order)
     - Store_Location (string)
     - Payment_Status (Strictly: "Paid" or "Unpaid")
     
     Input Text:
     \"\"\"
-    {invoice_text[:10000]} 
+    {compact_text} 
     \"\"\"
     """
 
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a JSON-only extraction bot."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-            )
-            content = response.choices[0].message.content
-            content = content.replace("```json", "").replace("```", "").strip()
-            return json.loads(content)
-
-        except Exception as e:
-            if attempt < MAX_RETRIES:
-                time.sleep(RETRY_DELAY)
-            else:
-                print(f"      ❌ Failed after {MAX_RETRIES} attempts.")
-                raise e
+    # Fast model first; escalate only on validation/arithmetic failures.
+    # With several tiers, escalation replaces retries so each logged call is one attempt.
+    tiers = get_model_tiers(model)
+    attempts = 1 if len(tiers) > 1 else MAX_RETRIES
+    data = route_extraction(
+        tiers,
+        lambda tier_model: _extract_with_model(client, tier_model, prompt, response_format, attempts),
+        invoice_text,
+        lines_omitted=OMISSION_MARKER in compact_text,
+    )
+    data.pop("Line_Amounts", None)
+    return data
 
 #Main Processing Function
 
@@ -187,6 +295,12 @@ def analyze_invoice_file(file_path: str):
     text = read_pdf_text(file_path)
     if not text.strip(): return None
 
+    # Near-duplicate check runs before the (expensive) LLM call
+    signature = minhash_signature(text)
+    existing = find_existing_invoice(signature, text, os.path.basename(file_path))
+    if existing:
+        print(f"      🔗 Near-duplicate of {existing.get('Invoice_ID')} ({existing['Similarity']:.0%} similar), skipping AI.")
+        return existing
    
     print("      🤖 Sending to AI...")
     raw_data = extract_invoice_with_llm(text)
@@ -194,10 +308,12 @@ def analyze_invoice_file(file_path: str):
 
     print("      🧠 Applying Business Rules...")
     enriched_data = apply_business_rules(raw_data)
+    enriched_data["_Fingerprint"] = signature
     
     return enriched_data
 
-def process_pdfs(data_dir: Path) -> pd.DataFrame:
+def process_pdfs(data_dir: Path) -> "pd.DataFrame":
+    import pandas as pd
     pdf_files = list(data_dir.glob("*.pdf"))
     print(f"📂 Found {len(pdf_files)} PDFs in {data_dir}")
     records = []
@@ -205,7 +321,9 @@ def process_pdfs(data_dir: Path) -> pd.DataFrame:
     for pdf in pdf_files:
         print(f"   📖 Processing: {pdf.name}...")
         invoice_json = analyze_invoice_file(str(pdf))
-        if invoice_json:
+        if invoice_json and invoice_json.get("Duplicate_Of"):
+            print(f"      🔗 Linked to existing record #{invoice_json['Duplicate_Of']}")
+        elif invoice_json:
             save_to_db(invoice_json)
             records.append(invoice_json)
             print(f"      ✅ Extracted: {invoice_json.get('Vendor')} | Action: {invoice_json.get('Recommended_Action')}")
@@ -226,6 +344,12 @@ if __name__ == "__main__":
         invoices_df = process_pdfs(DATA_DIR)
         if not invoices_df.empty:
             invoices_df.to_csv(OUTPUT_CSV, index=False)
+            try:
+                from parquet_store import write_parquet, OUTPUT_PARQUET
+                write_parquet(invoices_df, OUTPUT_PARQUET)
+                print(f"   📦 Parquet export: {OUTPUT_PARQUET.name}")
+            except ImportError:
+                print("   ⚠️ pyarrow not installed; skipped the Parquet export (CSV written).")
             print(f"\n✅ Pipeline Complete.")
     else:
         print(f"❌ Data directory not found: {DATA_DIR}")
\ No newline at end of file
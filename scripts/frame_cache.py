@@ -0,0 +1,107 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Compact, process-wide cache of the dashboard's invoice frames.
+#
+# Streamlit re-runs dashboard.py per session/interaction, but imported modules
+# persist, so one cached frame here is shared by every browser session
+# instead of each getting its own copy (st.cache_data hands out copies).
+# Frames are projected per view and use compact dtypes; callers must treat
+# them as read-only (filtering/sorting creates new frames, which is fine).
+
+TTL_SECONDS = 5
+MEMORY_BUDGET_BYTES = int(os.getenv("DASHBOARD_CACHE_MB", "256")) * 1024 * 1024
+
+DISPLAY_NAMES = {
+    "invoice_id": "Invoice ID", "vendor": "Vendor", "amount": "Amount",
+    "issue_date": "Issue Date", "due_date": "Due Date", "status": "Status",
+    "recommended_action": "Recommended Action", "items": "Items", "location": "Store Location",
+}
+
+# Columns loaded per view; the free-text `items` column only when shown
+VIEW_COLUMNS = {
+    "ledger": ["id", "invoice_id", "vendor", "amount", "issue_date", "due_date",
+               "location", "status", "recommended_action"],
+    "ledger_items": ["id", "invoice_id", "vendor", "amount", "issue_date", "due_date",
+                     "items", "location", "status", "recommended_action"],
+}
+
+CATEGORICAL = ["vendor", "location", "status", "recommended_action"]
+DATES = ["issue_date", "due_date"]
+
+_cache = OrderedDict()  # view -> (loaded_at, frame, nbytes)
+_lock = threading.Lock()
+
+#DTYPES
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Categoricals for repeated labels, datetimes for dates, narrow numerics when lossless."""
+    for col in CATEGORICAL:
+        if col in df.columns: df[col] = df[col].astype("category")
+    for col in DATES:
+        if col in df.columns: df[col] = pd.to_datetime(df[col], errors="coerce")
+    if "amount" in df.columns:
+        amount = pd.to_numeric(df["amount"], errors="coerce")
+        narrow = amount.astype(np.float32)
+        # float32 keeps ~7 significant digits; only use it if every value survives to the cent
+        if np.allclose(narrow.astype(np.float64), amount, rtol=0, atol=0.005, equal_nan=True):
+            amount = narrow
+        df["amount"] = amount
+    if "id" in df.columns and len(df) and df["id"].max() < np.iinfo(np.int32).max:
+        df["id"] = df["id"].astype(np.int32)
+    return df
+
+#CACHE
+
+def _load(db_path: str, view: str) -> pd.DataFrame:
+    columns = VIEW_COLUMNS[view]
+    with sqlite3.connect(db_path) as conn:
+        available = {r[1] for r in conn.execute("PRAGMA table_info(invoices)")}
+        selected = [c for c in columns if c in available]
+        df = pd.read_sql_query(f"SELECT {', '.join(selected)} FROM invoices", conn)
+    df = compact_frame(df)
+    if "recommended_action" not in df.columns:
+        df["recommended_action"] = pd.Categorical(["Review pending"] * len(df))
+    return df.rename(columns=DISPLAY_NAMES)
+
+
+def _evict():
+    """Drops least recently used frames until the cache fits the budget."""
+    total = sum(entry[2] for entry in _cache.values())
+    while _cache and total > MEMORY_BUDGET_BYTES:
+        _, (_, _, nbytes) = _cache.popitem(last=False)
+        total -= nbytes
+
+
+def load_view(db_path: str, view: str = "ledger") -> pd.DataFrame:
+    """Shared (read-only) invoice frame for a dashboard view."""
+    if not os.path.exists(db_path):
+        return pd.DataFrame()
+
+    with _lock:
+        entry = _cache.get(view)
+        if entry and time.monotonic() - entry[0] < TTL_SECONDS:
+            _cache.move_to_end(view)
+            return entry[1]
+
+        df = _load(db_path, view)
+        _cache[view] = (time.monotonic(), df, int(df.memory_usage(deep=True).sum()))
+        _cache.move_to_end(view)
+        _evict()
+        return df
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def cache_stats() -> dict:
+    with _lock:
+        return {view: nbytes for view, (_, _, nbytes) in _cache.items()}
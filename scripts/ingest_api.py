@@ -0,0 +1,232 @@
+import os
+import json
+import uuid
+import asyncio
+from pathlib import Path
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+# Small local HTTP ingestion service (stdlib asyncio, no web framework).
+#
+#   POST /invoices?filename=inv.pdf   body = raw PDF bytes (Content-Length required)
+#       -> 202 {"job_id": ..., "status": "queued"}
+#   GET  /jobs/<job_id>               -> job status and the extracted record
+#   GET  /health                      -> queue depth / capacity
+#
+# Uploads are streamed to UPLOAD_DIR in chunks. Extraction runs in a thread
+# pool (analyze_invoice_file + save_to_db, same path as the CLI/dashboard).
+# When the queue is full (counting uploads still streaming in) new uploads
+# get 503 + Retry-After and their body is never written to disk. Clients that
+# send `Expect: 100-continue` are turned away before sending the body at all.
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+UPLOAD_DIR = BASE_DIR / "uploads"
+
+HOST = os.getenv("INGEST_HOST", "127.0.0.1")
+PORT = int(os.getenv("INGEST_PORT", "8765"))
+WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "200"))
+MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+MAX_TRACKED_JOBS = 10_000
+DRAIN_IDLE_SECONDS = 1.0  # for bodies of unknown length (bad Content-Length)
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               411: "Length Required", 413: "Payload Too Large", 415: "Unsupported Media Type",
+               503: "Service Unavailable"}
+
+#JOB PROCESSING
+
+def process_upload(path: str) -> dict:
+    """Blocking extraction for one stored upload (runs in the thread pool)."""
+    # Imported here so the server starts without loading the extraction stack
+    from extract_ai import analyze_invoice_file, save_to_db
+
+    record = analyze_invoice_file(path)
+    if record:
+        save_to_db(record)
+    return record
+
+
+class IngestService:
+    def __init__(self, workers: int = WORKERS, queue_size: int = QUEUE_SIZE):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()
+        self.receiving = 0  # uploads still streaming; they hold a queue slot
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+
+    def _track(self, job: dict):
+        self.jobs[job["job_id"]] = job
+        while len(self.jobs) > MAX_TRACKED_JOBS:
+            self.jobs.popitem(last=False)
+
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id, path = await self.queue.get()
+            job = self.jobs.get(job_id, {})
+            job["status"] = "processing"
+            try:
+                record = await loop.run_in_executor(self.executor, process_upload, path)
+                job["record"] = record
+                job["status"] = "done" if record else "failed"
+                if not record:
+                    job["error"] = "No text could be extracted from the PDF"
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+            finally:
+                if os.path.exists(path): os.remove(path)
+                self.queue.task_done()
+
+    #HTTP
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return await self.respond(writer, 400, {"error": "Malformed request"})
+
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, _ = lines[0].split(" ", 2)
+            except ValueError:
+                return await self.respond(writer, 400, {"error": "Malformed request line"})
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            if url.path == "/invoices":
+                if method != "POST":
+                    return await self.respond(writer, 405, {"error": "Use POST"})
+                return await self.upload(reader, writer, headers, parse_qs(url.query))
+            if url.path.startswith("/jobs/") and method == "GET":
+                job = self.jobs.get(url.path[len("/jobs/"):])
+                if not job:
+                    return await self.respond(writer, 404, {"error": "Unknown job"})
+                return await self.respond(writer, 200, job)
+            if url.path == "/health" and method == "GET":
+                return await self.respond(writer, 200, {
+                    "queued": self.queue.qsize(), "receiving": self.receiving, "capacity": self.queue.maxsize, "workers": self.workers,
+                })
+            return await self.respond(writer, 404, {"error": "Not found"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def reject(self, reader, writer, status: int, payload: dict, length: int, extra_headers: dict = None):
+        """
+        Responds without storing the body. Clients that did not wait for
+        `100 Continue` are already sending it, so it is read and dropped
+        (closing with unread data would reset the connection before the
+        client sees the response). With `length=None` whatever the client
+        sends is dropped until it goes idle, up to MAX_UPLOAD_BYTES.
+        """
+        await self.respond(writer, status, payload, extra_headers)
+        if length is None:
+            remaining = MAX_UPLOAD_BYTES
+            try:
+                while remaining > 0:
+                    chunk = await asyncio.wait_for(reader.read(CHUNK_SIZE), DRAIN_IDLE_SECONDS)
+                    if not chunk: break
+                    remaining -= len(chunk)
+            except asyncio.TimeoutError:
+                pass
+            return
+        remaining = length
+        while remaining > 0:
+            chunk = await reader.read(min(CHUNK_SIZE, remaining))
+            if not chunk: break
+            remaining -= len(chunk)
+
+    async def upload(self, reader, writer, headers: dict, query: dict):
+        if "content-length" not in headers:
+            return await self.respond(writer, 411, {"error": "Content-Length required"})
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Body size unknown: drain what arrives so the 400 is not lost to a reset
+            return await self.reject(reader, writer, 400, {"error": "Invalid Content-Length"}, None)
+        if length == 0:
+            return await self.respond(writer, 400, {"error": "Empty upload"})
+        if length > MAX_UPLOAD_BYTES:
+            return await self.respond(writer, 413, {"error": f"Upload exceeds {MAX_UPLOAD_BYTES} bytes"})
+
+        expect_continue = headers.get("expect", "").lower() == "100-continue"
+        body_length = 0 if expect_continue else length
+        if self.queue.qsize() + self.receiving >= self.queue.maxsize:
+            return await self.reject(reader, writer, 503, {"error": "Extraction queue is full, retry later"},
+                                     body_length, extra_headers={"Retry-After": "5"})
+        # Reserve the slot before any await so concurrent uploads cannot both take the last one
+        self.receiving += 1
+        path = None
+        try:
+            content_type = headers.get("content-type", "application/pdf").split(";")[0].strip()
+            if content_type not in ("application/pdf", "application/octet-stream"):
+                return await self.reject(reader, writer, 415, {"error": "Send the raw PDF as application/pdf"},
+                                         body_length)
+            if expect_continue:
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+
+            job_id = uuid.uuid4().hex
+            filename = os.path.basename(query.get("filename", [f"{job_id}.pdf"])[0]) or f"{job_id}.pdf"
+            UPLOAD_DIR.mkdir(exist_ok=True)
+            path = UPLOAD_DIR / f"{job_id}_{filename}"
+
+            # Stream the body to disk; never hold the whole file in memory
+            remaining = length
+            with open(path, "wb") as f:
+                while remaining:
+                    chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError("Upload ended early")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except BaseException:
+            if path is not None and path.exists(): path.unlink()
+            raise
+        finally:
+            self.receiving -= 1
+
+        # No await since the slot was released, so the queue cannot have filled up
+        self.queue.put_nowait((job_id, str(path)))
+        self._track({"job_id": job_id, "filename": filename, "status": "queued", "error": None, "record": None})
+        return await self.respond(writer, 202, {"job_id": job_id, "status": "queued"},
+                                  extra_headers={"Location": f"/jobs/{job_id}"})
+
+    async def respond(self, writer, status: int, payload: dict, extra_headers: dict = None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        head += [f"{k}: {v}" for k, v in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str = HOST, port: int = PORT):
+        for _ in range(self.workers):
+            asyncio.create_task(self.worker())
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+        print(f"🌐 Ingestion API listening on http://{host}:{port} "
+              f"({self.workers} workers, queue capacity {self.queue.maxsize})")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(IngestService().serve())
+    except KeyboardInterrupt:
+        print("\n👋 Ingestion API stopped.")
@@ -1,12 +1,17 @@
 import sqlite3
 import os
 
+from rollups import ensure_rollups
+from search_index import ensure_search_index
+from near_dupes import ensure_near_dupe_index
+from alert_scheduler import ensure_alert_tables
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "invoices.db")
+# INVOICE_DB_PATH points tools (e.g. startup_budget.py) at a scratch database
+DB_PATH = os.getenv("INVOICE_DB_PATH") or os.path.join(BASE_DIR, "invoices.db")
 
-def init_db():
-    """Creates the invoices table if it doesn't exist"""
-    conn = sqlite3.connect(DB_PATH)
+def ensure_schema(conn):
+    """Creates the invoices table and its indexes on an open connection"""
     cursor = conn.cursor()
     
     # Create Table Schema
@@ -25,7 +30,26 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    
+
+    # Lookup index for the invoice key (used to dedupe bulk loads)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_key ON invoices (invoice_id, vendor)")
+
+    # Spend/status summary tables maintained by triggers
+    ensure_rollups(conn)
+
+    # Full-text search over vendor / invoice id / location / items
+    ensure_search_index(conn)
+
+    # MinHash/LSH fingerprints for near-duplicate invoices
+    ensure_near_dupe_index(conn)
+
+    # due_date index, scheduler state and alert outbox
+    ensure_alert_tables(conn)
+
+def init_db():
+    """Creates the invoices table if it doesn't exist"""
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
     conn.commit()
     conn.close()
     print(f"✅ Database initialized at: {DB_PATH}")
@@ -0,0 +1,199 @@
+import re
+import json
+from datetime import datetime
+
+# Local clean-up of LLM extraction output: repair almost-JSON, then coerce
+# and validate the fields the business rules depend on. Only responses that
+# are still unusable after this are worth another round trip to the model.
+
+# JSON Schema for providers that support structured output (response_format)
+INVOICE_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "Invoice_ID": {"type": ["string", "null"]},
+        "Vendor": {"type": ["string", "null"]},
+        "Amount": {"type": ["number", "null"]},
+        "Issue_Date": {"type": ["string", "null"], "description": "YYYY-MM-DD"},
+        "Due_Date": {"type": ["string", "null"], "description": "YYYY-MM-DD"},
+        "Items": {"type": "array", "items": {"type": "string"}},
+        "Line_Amounts": {"type": "array", "items": {"type": "number"}},
+        "Store_Location": {"type": ["string", "null"]},
+        "Payment_Status": {"type": "string", "enum": ["Paid", "Unpaid"]},
+    },
+    "required": ["Invoice_ID", "Vendor", "Amount", "Issue_Date", "Due_Date",
+                 "Items", "Line_Amounts", "Store_Location", "Payment_Status"],
+    "additionalProperties": False,
+}
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d",
+                "%d %b %Y", "%d %B %Y", "%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y"]
+
+PAID_WORDS = {"paid", "settled", "fully paid"}
+UNPAID_WORDS = {"unpaid", "pending", "due", "overdue", "outstanding", "not paid", "open", "partially paid"}
+
+#REPAIR
+
+LITERALS = {"None": "null", "NULL": "null", "True": "true", "False": "false"}
+
+
+def repair_json(content: str) -> str:
+    """
+    Best-effort fix-up of common LLM JSON mistakes: code fences and prose
+    around the object, trailing commas, Python literals, and truncation
+    (unterminated string, unclosed arrays/objects).
+    """
+    text = (content or "").replace("```json", "").replace("```", "").strip()
+    start = text.find("{")
+    if start == -1:
+        return text
+    text = text[start:]
+
+    out, stack = [], []
+    in_string, escaped, i = False, False, 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            if stack: stack.pop()
+            out.append(ch)
+            if not stack:
+                break  # end of the top-level object; ignore anything after it
+        elif ch.isalpha():
+            word = re.match(r"[A-Za-z]+", text[i:]).group(0)
+            out.append(LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if in_string:
+        out.append('"')
+    if stack:
+        # A dangling key or separator cannot be completed; drop it. A trailing
+        # string is only a key inside an object; in an array it is a value.
+        dangling = r',\s*"[^"]*"\s*:?\s*$|[,:]\s*$' if stack[-1] == "}" else r',\s*$'
+        repaired = re.sub(dangling, "", "".join(out).rstrip())
+        out = [repaired]
+        _strip_trailing_comma(out)
+        out.extend(reversed(stack))
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: list):
+    """Removes a trailing ',' (and whitespace) from the output buffer."""
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1].endswith(","):
+        out[-1] = out[-1][:-1]
+
+
+def parse_llm_json(content: str) -> dict:
+    """json.loads with a local repair pass before giving up (raises ValueError)."""
+    cleaned = (content or "").replace("```json", "").replace("```", "").strip()
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        data = json.loads(repair_json(content))
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    return data
+
+#VALIDATION
+
+def parse_amount(value):
+    """Number or strings like 'AED 9,500.00' / '9.500,00 AED' -> float (None if invalid)."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    # Drop currency prefixes such as 'Rs.' or 'AED.' before their dot is read as a decimal point
+    start = re.search(r"-?\d", str(value))
+    if not start:
+        return None
+    text = re.sub(r"[^\d,.\-]", "", str(value)[start.start():])
+    # Decimal comma (e.g. 9.500,00): swap separators
+    if re.search(r",\d{1,2}$", text) and "." in text:
+        text = text.replace(".", "").replace(",", ".")
+    elif re.search(r",\d{1,2}$", text):
+        text = text.replace(",", ".")
+    else:
+        text = text.replace(",", "")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_date(value):
+    """Common invoice date formats -> 'YYYY-MM-DD' (None if invalid)."""
+    if not value:
+        return None
+    text = re.sub(r"\s+", " ", str(value)).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def validate_invoice(data: dict) -> tuple:
+    """
+    Coerces schema fields in place and returns (data, errors).
+    Errors are only raised for fields the business rules rely on.
+    """
+    errors = []
+
+    amount = parse_amount(data.get("Amount"))
+    if amount is None:
+        errors.append(f"Amount is not a number: {data.get('Amount')!r}")
+    else:
+        data["Amount"] = amount
+
+    for field in ["Issue_Date", "Due_Date"]:
+        raw = data.get(field)
+        parsed = parse_date(raw)
+        if parsed:
+            data[field] = parsed
+        elif raw:
+            if field == "Due_Date":
+                errors.append(f"Due_Date is not YYYY-MM-DD: {raw!r}")
+            data[field] = None
+
+    status = str(data.get("Payment_Status") or "").strip().lower()
+    if status in PAID_WORDS:
+        data["Payment_Status"] = "Paid"
+    elif status in UNPAID_WORDS:
+        data["Payment_Status"] = "Unpaid"
+    else:
+        errors.append(f"Payment_Status must be 'Paid' or 'Unpaid': {data.get('Payment_Status')!r}")
+
+    items = data.get("Items")
+    if isinstance(items, str):
+        data["Items"] = [items]
+    elif items is None:
+        data["Items"] = []
+
+    # Per-line totals are only used for arithmetic checks (see model_router.py)
+    line_amounts = data.get("Line_Amounts")
+    if isinstance(line_amounts, list):
+        data["Line_Amounts"] = [a for a in map(parse_amount, line_amounts) if a is not None]
+    else:
+        data["Line_Amounts"] = []
+
+    return data, errors
@@ -1,11 +1,13 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 
 
 load_dotenv()
 
 def get_llm_client():
+    # Imported on first use: the OpenAI SDK is the slowest import in the pipeline
+    from openai import OpenAI
+
     provider = os.getenv("LLM_PROVIDER", "longcat")
 
     if provider == "longcat":
@@ -41,3 +43,39 @@ def get_llm_client():
 
     else:
         raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
+
+
+
+def get_response_format(schema: dict = None):
+    """
+    response_format for chat.completions, or None when JSON mode is off.
+    LLM_JSON_MODE: "json_schema", "json_object" or "off"; the default
+    depends on the provider (OpenRouter supports structured outputs).
+    """
+    provider = os.getenv("LLM_PROVIDER", "longcat")
+    default = "json_schema" if provider == "openrouter" else "json_object"
+    mode = os.getenv("LLM_JSON_MODE", default).lower()
+
+    if mode == "json_schema" and schema:
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "invoice", "strict": True, "schema": schema},
+        }
+    if mode in ("json_object", "json_schema"):
+        return {"type": "json_object"}
+    return None
+
+
+def get_model_tiers(default_model: str) -> list:
+    """
+    [(tier, model, price_per_1m_tokens)] cheapest first, for model_router.
+    LLM_FAST_MODEL / LLM_STRONG_MODEL default to the provider model; prices
+    (LLM_FAST_PRICE / LLM_STRONG_PRICE, USD per 1M tokens) are for reporting.
+    """
+    fast = os.getenv("LLM_FAST_MODEL") or default_model
+    strong = os.getenv("LLM_STRONG_MODEL") or default_model
+
+    tiers = [("fast", fast, float(os.getenv("LLM_FAST_PRICE", "0")))]
+    if strong != fast:
+        tiers.append(("strong", strong, float(os.getenv("LLM_STRONG_PRICE", "0"))))
+    return tiers
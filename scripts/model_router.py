@@ -0,0 +1,160 @@
+import os
+import time
+import sqlite3
+from datetime import datetime
+
+from init_db import DB_PATH
+from near_dupes import amount_in_text, invoice_id_in_text
+
+# Tiered model routing: every invoice goes to the fast/cheap tier first and
+# is only escalated to the next tier when the result fails validation or
+# scores below the confidence threshold (ROUTER_MIN_CONFIDENCE, read per
+# call so .env values apply). Every call is logged to `llm_calls` so the
+# threshold and tier models can be tuned against real traffic
+# (python scripts/model_router.py prints the per-tier report).
+
+DEFAULT_MIN_CONFIDENCE = 0.75
+AMOUNT_TOLERANCE = 0.01   # 1% rounding slack for line-item arithmetic
+VAT_RATE = 0.05           # UAE VAT; totals may be net + VAT
+
+# Confidence penalties per failed check
+PENALTIES = {
+    "validation": 0.5,
+    "line_items_sum": 0.35,
+    "amount_not_in_text": 0.25,
+    "invoice_id_not_in_text": 0.15,
+    "missing_vendor": 0.2,
+    "due_before_issue": 0.2,
+}
+
+#SCORING
+
+def score_extraction(data: dict, errors: list, source_text: str, check_line_items: bool = True) -> tuple:
+    """
+    Returns (confidence 0..1, [issues]) from schema validation errors and
+    cross-checks against the invoice text and the extracted line amounts.
+    Pass check_line_items=False when the prompt left line items out.
+    """
+    issues = []
+    if errors:
+        issues.append("validation")
+
+    amount = data.get("Amount")
+    line_amounts = [a for a in data.get("Line_Amounts") or [] if isinstance(a, (int, float))]
+    if check_line_items and isinstance(amount, (int, float)) and line_amounts:
+        line_sum = sum(line_amounts)
+        tolerance = max(abs(amount) * AMOUNT_TOLERANCE, 0.05)
+        if not (abs(line_sum - amount) <= tolerance or abs(line_sum * (1 + VAT_RATE) - amount) <= tolerance):
+            issues.append("line_items_sum")
+
+    if isinstance(amount, (int, float)) and not amount_in_text(amount, source_text):
+        issues.append("amount_not_in_text")
+
+    invoice_id = str(data.get("Invoice_ID") or "").strip()
+    if invoice_id and not invoice_id_in_text(invoice_id, source_text):
+        issues.append("invoice_id_not_in_text")
+
+    if not str(data.get("Vendor") or "").strip():
+        issues.append("missing_vendor")
+
+    issue_date, due_date = data.get("Issue_Date"), data.get("Due_Date")
+    if issue_date and due_date and due_date < issue_date:
+        issues.append("due_before_issue")
+
+    confidence = max(0.0, 1.0 - sum(PENALTIES[i] for i in issues))
+    return confidence, issues
+
+#METRICS
+
+def ensure_llm_metrics(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tier TEXT,
+            model TEXT,
+            latency_ms REAL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            cost REAL,
+            confidence REAL,
+            issues TEXT,
+            escalated INTEGER,
+            created_at TIMESTAMP
+        )
+    ''')
+
+
+def record_llm_call(tier, model, latency_ms, usage, cost, confidence, issues, escalated):
+    if not os.path.exists(DB_PATH): return
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            ensure_llm_metrics(conn)
+            conn.execute('''
+                INSERT INTO llm_calls (tier, model, latency_ms, prompt_tokens, completion_tokens,
+                                       cost, confidence, issues, escalated, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (tier, model, latency_ms, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                  cost, confidence, ",".join(issues), int(escalated), datetime.now().isoformat(timespec="seconds")))
+    except sqlite3.Error as e:
+        print(f"      ⚠️ Could not record LLM metrics: {e}")
+
+
+def tier_report(conn) -> list:
+    """[(tier, model, calls, avg_latency_ms, avg_cost, avg_confidence, escalation_rate)]"""
+    ensure_llm_metrics(conn)
+    return conn.execute('''
+        SELECT tier, model, COUNT(*), AVG(latency_ms), AVG(cost), AVG(confidence), AVG(escalated)
+        FROM llm_calls GROUP BY tier, model ORDER BY MIN(id)
+    ''').fetchall()
+
+#ROUTING
+
+def route_extraction(tiers: list, extract_fn, source_text: str, min_confidence: float = None,
+                     lines_omitted: bool = False) -> dict:
+    """
+    tiers: [(tier_name, model, price_per_1m_tokens)], cheapest first.
+    extract_fn(model) -> (data, errors, usage). Returns the first result that
+    clears `min_confidence`, otherwise the most confident one seen.
+    `lines_omitted`: the prompt text was cut to a budget, so the line items
+    the model saw cannot be expected to add up to the total.
+    """
+    if min_confidence is None:
+        min_confidence = float(os.getenv("ROUTER_MIN_CONFIDENCE", str(DEFAULT_MIN_CONFIDENCE)))
+    best, best_confidence = None, -1.0
+    for i, (tier, model, price) in enumerate(tiers):
+        is_last = i == len(tiers) - 1
+        start = time.perf_counter()
+        try:
+            data, errors, usage = extract_fn(model)
+        except Exception as e:
+            latency_ms = (time.perf_counter() - start) * 1000
+            record_llm_call(tier, model, latency_ms, {}, 0.0, 0.0, ["error"], not is_last)
+            if is_last and best is None:
+                raise
+            print(f"      ⚠️ {tier} tier failed ({e}), escalating.")
+            continue
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        tokens = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        cost = tokens * price / 1_000_000
+        confidence, issues = score_extraction(data, errors, source_text, check_line_items=not lines_omitted)
+        escalate = confidence < min_confidence and not is_last
+        record_llm_call(tier, model, latency_ms, usage, cost, confidence, issues, escalate)
+        print(f"      🧭 {tier} tier ({model}): confidence {confidence:.2f}, {latency_ms:,.0f} ms"
+              + (f" — escalating ({', '.join(issues)})" if escalate else ""))
+
+        if confidence > best_confidence:
+            best, best_confidence = data, confidence
+        if not escalate:
+            break
+    return best
+
+
+if __name__ == "__main__":
+    with sqlite3.connect(DB_PATH) as conn:
+        rows = tier_report(conn)
+    if not rows:
+        print("No LLM calls recorded yet.")
+    for tier, model, calls, latency, cost, confidence, escalated in rows:
+        print(f"{tier:<8} {model or '-':<40} calls={calls:<6} avg_latency={latency:,.0f} ms "
+              f"avg_cost=${cost or 0:.5f} avg_confidence={confidence or 0:.2f} escalated={escalated or 0:.0%}")
@@ -0,0 +1,176 @@
+import re
+import struct
+import random
+import hashlib
+import unicodedata
+from array import array
+
+# Near-duplicate detection for invoice text (re-scans, reminder copies,
+# re-rendered PDFs). Each invoice gets a MinHash signature over word
+# shingles; LSH banding turns a lookup into one indexed IN query on
+# `invoice_lsh`, followed by an exact signature comparison on the few
+# candidates it returns. Recurring bills on one vendor template can be just
+# as similar as a re-scan, so a match only counts when the stored invoice's
+# ID and total also appear in the new text.
+
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.8
+MIN_BAND_HITS = 4      # P(hits >= 4) > 0.999 at 0.8 similarity, ~0.01 at 0.4
+MAX_CANDIDATES = 10
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed seed: signatures must be stable across runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+#SCHEMA
+
+def ensure_near_dupe_index(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_fingerprints (
+            invoice_row_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_lsh (
+            bucket INTEGER NOT NULL,
+            invoice_row_id INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoice_lsh_bucket ON invoice_lsh (bucket)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoice_lsh_row ON invoice_lsh (invoice_row_id)")
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_fingerprint_delete AFTER DELETE ON invoices BEGIN
+            DELETE FROM invoice_fingerprints WHERE invoice_row_id = old.id;
+            DELETE FROM invoice_lsh WHERE invoice_row_id = old.id;
+        END
+    ''')
+    # Files that were linked to an existing invoice instead of re-extracted
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_row_id INTEGER NOT NULL,
+            source TEXT,
+            similarity REAL,
+            linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+#SIGNATURES
+
+def normalize_text(text: str) -> list:
+    """Lowercased word tokens; layout, punctuation and spacing are ignored."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return re.findall(r"\w+", text)
+
+
+def shingles(tokens: list, size: int = SHINGLE_SIZE) -> set:
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(text: str) -> array:
+    """NUM_PERM-long MinHash signature of the text's word shingles."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        for s in shingles(normalize_text(text))
+    ]
+    if not hashes:
+        return array("Q", [_MERSENNE_PRIME] * NUM_PERM)
+    return array("Q", [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    ])
+
+
+def lsh_buckets(signature: array) -> list:
+    """One signed 64-bit bucket key per band (band number is part of the key)."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<I{ROWS_PER_BAND}Q", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def similarity(sig_a: array, sig_b: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+#LOOKUP & REGISTRATION
+
+def _flatten(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").lower()
+
+
+def amount_in_text(amount: float, text: str) -> bool:
+    """True if `amount` appears in `text` in a common format (9,500.00 / 9500.00 / 9,500 / 9500)."""
+    flat_text = _flatten(text)
+    return any(v in flat_text for v in (f"{amount:,.2f}", f"{amount:.2f}", f"{amount:,.0f}", f"{amount:.0f}"))
+
+
+def invoice_id_in_text(invoice_id, text: str) -> bool:
+    """Case-insensitive check that a non-empty invoice ID appears in `text`."""
+    invoice_id = str(invoice_id or "").strip().lower()
+    return bool(invoice_id) and invoice_id in _flatten(text)
+
+
+def identity_in_text(invoice_id, amount, text: str) -> bool:
+    """True if both the invoice ID and the total appear in `text`."""
+    return amount is not None and invoice_id_in_text(invoice_id, text) and amount_in_text(float(amount), text)
+
+
+def find_near_duplicate(conn, signature: array, source_text: str, threshold: float = SIMILARITY_THRESHOLD):
+    """
+    Returns (invoice_row_id, similarity) of the closest stored invoice whose
+    ID and amount are confirmed in `source_text`, or None.
+    """
+    buckets = lsh_buckets(signature)
+    placeholders = ", ".join("?" * len(buckets))
+    # Only invoices sharing several bands are compared: same-vendor template
+    # siblings typically hit one or two bands, true re-sends hit most of them.
+    candidates = conn.execute(f'''
+        SELECT f.invoice_row_id, f.signature, i.invoice_id, i.amount FROM invoice_fingerprints f
+        JOIN (
+            SELECT invoice_row_id, COUNT(*) AS hits FROM invoice_lsh
+            WHERE bucket IN ({placeholders})
+            GROUP BY invoice_row_id HAVING hits >= ?
+            ORDER BY hits DESC LIMIT ?
+        ) c ON c.invoice_row_id = f.invoice_row_id
+        JOIN invoices i ON i.id = f.invoice_row_id
+    ''', [*buckets, MIN_BAND_HITS, MAX_CANDIDATES]).fetchall()
+
+    scored = [(similarity(signature, array("Q", blob)), row_id, invoice_id, amount)
+              for row_id, blob, invoice_id, amount in candidates]
+    for score, row_id, invoice_id, amount in sorted(scored, reverse=True):
+        if score < threshold:
+            break
+        if identity_in_text(invoice_id, amount, source_text):
+            return row_id, score
+    return None
+
+
+def register_fingerprint(conn, invoice_row_id: int, signature: array):
+    conn.execute(
+        "INSERT OR REPLACE INTO invoice_fingerprints (invoice_row_id, signature) VALUES (?, ?)",
+        (invoice_row_id, signature.tobytes()),
+    )
+    conn.execute("DELETE FROM invoice_lsh WHERE invoice_row_id = ?", (invoice_row_id,))
+    conn.executemany(
+        "INSERT INTO invoice_lsh (bucket, invoice_row_id) VALUES (?, ?)",
+        [(bucket, invoice_row_id) for bucket in lsh_buckets(signature)],
+    )
+
+
+def link_duplicate(conn, invoice_row_id: int, source: str, score: float):
+    conn.execute(
+        "INSERT INTO invoice_links (invoice_row_id, source, similarity) VALUES (?, ?, ?)",
+        (invoice_row_id, source, score),
+    )
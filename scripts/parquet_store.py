@@ -0,0 +1,122 @@
+import io
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_PARQUET = BASE_DIR / "extracted_invoices.parquet"
+
+# Typed schema for the extraction output (same columns as extracted_invoices.csv)
+INVOICE_SCHEMA = pa.schema([
+    ("Invoice_ID", pa.string()),
+    ("Vendor", pa.string()),
+    ("Amount", pa.float64()),
+    ("Issue_Date", pa.date32()),
+    ("Due_Date", pa.date32()),
+    ("Items", pa.string()),
+    ("Store_Location", pa.string()),
+    ("Payment_Status", pa.string()),
+    ("Status", pa.string()),
+    ("Recommended_Action", pa.string()),
+])
+
+# Dashboard ledger column names (frame_cache.DISPLAY_NAMES) -> INVOICE_SCHEMA
+LEDGER_COLUMNS = {
+    "Invoice ID": "Invoice_ID", "Vendor": "Vendor", "Amount": "Amount",
+    "Issue Date": "Issue_Date", "Due Date": "Due_Date", "Items": "Items",
+    "Store Location": "Store_Location", "Status": "Status",
+    "Recommended Action": "Recommended_Action",
+}
+
+#CONVERSION
+
+def to_arrow(df: pd.DataFrame, schema: pa.Schema = INVOICE_SCHEMA) -> pa.Table:
+    """
+    Converts a DataFrame to an Arrow table. With a schema, columns are coerced
+    to the declared types (missing ones become nulls, extra ones are dropped).
+    """
+    if schema is None:
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    df = df.copy()
+    for field in schema:
+        if field.name not in df.columns:
+            df[field.name] = None
+        elif pa.types.is_date(field.type):
+            df[field.name] = pd.to_datetime(df[field.name], errors="coerce").dt.date
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(df[field.name], errors="coerce")
+        elif pa.types.is_string(field.type):
+            df[field.name] = df[field.name].map(lambda v: None if v is None or v != v else str(v))
+
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+def from_ledger(df: pd.DataFrame) -> pd.DataFrame:
+    """Maps a dashboard ledger frame onto the INVOICE_SCHEMA column names."""
+    out = df.rename(columns=LEDGER_COLUMNS)
+    # The ledger has no raw payment status; it is implied by the rule-based Status
+    out["Payment_Status"] = out["Status"].map(lambda s: "Paid" if s == "Paid" else "Unpaid")
+    return out
+
+#WRITE
+
+def write_parquet(df: pd.DataFrame, dest, date_col: str = "Issue_Date", schema: pa.Schema = INVOICE_SCHEMA):
+    """
+    Writes invoices to Parquet with one row group per calendar month of
+    `date_col`, so month-filtered reads only touch the row groups they need.
+    `dest` can be a path or a writable binary file object.
+    """
+    table = to_arrow(df, schema)
+    if table.num_rows == 0:
+        pq.write_table(table, dest, compression="zstd")
+        return
+
+    months = pd.to_datetime(df[date_col], errors="coerce").dt.to_period("M").reset_index(drop=True)
+    order = months.sort_values(na_position="last", kind="stable").index
+    table = table.take(pa.array(order))
+    keys = months.iloc[order].astype(str).tolist()
+
+    with pq.ParquetWriter(dest, table.schema, compression="zstd") as writer:
+        start = 0
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[start]:
+                writer.write_table(table.slice(start, i - start), row_group_size=i - start)
+                start = i
+
+
+def parquet_bytes(df: pd.DataFrame, date_col: str = "Issue_Date", schema: pa.Schema = INVOICE_SCHEMA) -> bytes:
+    """Same as write_parquet() but returns the file contents (for downloads)."""
+    buffer = io.BytesIO()
+    write_parquet(df, buffer, date_col=date_col, schema=schema)
+    return buffer.getvalue()
+
+#READ
+
+def read_parquet(path=OUTPUT_PARQUET, columns=None, months=None) -> pa.Table:
+    """
+    Memory-mapped Arrow read. `months` is an optional list of "YYYY-MM"
+    strings; row groups outside those months are skipped via statistics.
+    """
+    filters = None
+    if months:
+        bounds = [pd.Period(m, freq="M") for m in months]
+        filters = [
+            [("Issue_Date", ">=", p.start_time.date()), ("Issue_Date", "<=", p.end_time.date())]
+            for p in bounds
+        ]
+    return pq.read_table(str(path), columns=columns, filters=filters, memory_map=True)
+
+
+def iter_parquet_batches(path=OUTPUT_PARQUET, columns=None, batch_size: int = 50_000, months=None):
+    """
+    Yields DataFrame chunks from the Parquet file without loading it whole.
+    With `months`, only the matching row groups are read (see read_parquet).
+    """
+    if months:
+        batches = read_parquet(path, columns=columns, months=months).to_batches(max_chunksize=batch_size)
+    else:
+        batches = pq.ParquetFile(str(path), memory_map=True).iter_batches(batch_size=batch_size, columns=columns)
+    for batch in batches:
+        yield batch.to_pandas()
@@ -0,0 +1,125 @@
+import re
+
+# Shrinks raw PDF text before it goes into the extraction prompt:
+# whitespace is normalized, headers/footers repeated across pages and legal
+# boilerplate are dropped, and if the text is still over budget the lines
+# most likely to hold schema fields (IDs, dates, totals) are kept first.
+
+PAGE_BREAK = "\f"
+CHARS_PER_TOKEN = 4          # rough estimate for Latin-script invoices
+DEFAULT_TOKEN_BUDGET = 2500  # about the old invoice_text[:10000] cut-off
+HEADER_LINES = 6             # first lines usually carry the vendor name/address
+EDGE_LINES = 4               # lines at the top/bottom of a page that may be a running header/footer
+OMISSION_MARKER = "[...]"
+
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d+\s*(/|of)\s*\d+$|^page\s*\d+$", re.I)
+BOILERPLATE_RE = re.compile(
+    r"terms (and|&) conditions|computer[- ]generated|does not require (a )?signature|"
+    r"thank you for your business|all rights reserved|confidential|"
+    r"subject to .*jurisdiction|e\.?\s?&\s?o\.?\s?e|errors and omissions",
+    re.I,
+)
+
+# Patterns for lines that usually carry schema fields, with weights
+FIELD_PATTERNS = [
+    (re.compile(r"\b(grand\s+)?total\b|amount\s+due|balance|sub-?total|net\s+payable", re.I), 5),
+    (re.compile(r"\bdue\b|payment\s+terms|\bpaid\b|\bunpaid\b|\bstatus\b", re.I), 4),
+    (re.compile(r"invoice\s*(no|number|#|id)|\binv\b|\bno[:.]|\bref\b|\bbill\s+to\b", re.I), 4),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b|\b\d{1,2}\s+[a-z]{3,9}\s+\d{4}\b", re.I), 3),
+    (re.compile(r"\b(aed|usd|eur|gbp|sar)\b|[$€£]|\d[\d,]*\.\d{2}\b", re.I), 2),
+    (re.compile(r"\bvat\b|\btrn\b|\btax\b|location|branch|store|address", re.I), 1),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clean_pages(text: str) -> list:
+    """Per-page lists of whitespace-normalized, non-empty lines."""
+    pages = []
+    for page in (text or "").split(PAGE_BREAK):
+        lines = [re.sub(r"\s+", " ", line).strip() for line in page.splitlines()]
+        pages.append([line for line in lines if line])
+    return pages
+
+
+def _line_score(line: str) -> int:
+    return sum(weight for pattern, weight in FIELD_PATTERNS if pattern.search(line))
+
+
+def _drop_noise(pages: list) -> list:
+    """
+    Flattens pages, dropping running headers/footers, page numbers and
+    boilerplate. A line counts as a header/footer only if it repeats on
+    several pages and sits within EDGE_LINES of the top or bottom on every
+    one of them, so repeated line items survive. Boilerplate lines that
+    also carry a schema field are kept.
+    """
+    page_count, edge_count = {}, {}
+    for lines in pages:
+        edges = set(lines[:EDGE_LINES] + lines[-EDGE_LINES:])
+        for line in set(lines):
+            page_count[line] = page_count.get(line, 0) + 1
+            if line in edges:
+                edge_count[line] = edge_count.get(line, 0) + 1
+
+    kept, seen_repeats = [], set()
+    for lines in pages:
+        for line in lines:
+            if PAGE_NUMBER_RE.match(line):
+                continue
+            if BOILERPLATE_RE.search(line) and not _line_score(line):
+                continue
+            if page_count[line] > 1 and edge_count.get(line) == page_count[line]:
+                # Running header/footer: keep the first copy only
+                if line in seen_repeats:
+                    continue
+                seen_repeats.add(line)
+            kept.append(line)
+    return kept
+
+
+def _select_lines(lines: list, token_budget: int) -> list:
+    """Keeps the highest-value lines within budget, in original order."""
+    scores = [_line_score(line) for line in lines]
+    for i in range(min(HEADER_LINES, len(lines))):
+        scores[i] += 6
+    # Values often sit on the line after their label
+    for i, score in enumerate(list(scores)):
+        if score and i + 1 < len(scores):
+            scores[i + 1] = max(scores[i + 1], score // 2)
+
+    # Leave room for the omission markers
+    budget_chars = token_budget * CHARS_PER_TOKEN * 95 // 100
+    chosen, used = set(), 0
+    for i in sorted(range(len(lines)), key=lambda i: (-scores[i], i)):
+        cost = len(lines[i]) + 1
+        if used + cost > budget_chars:
+            continue
+        chosen.add(i)
+        used += cost
+
+    selected, last = [], -1
+    for i in sorted(chosen):
+        if i != last + 1:
+            selected.append(OMISSION_MARKER)
+        selected.append(lines[i])
+        last = i
+    if last != len(lines) - 1 and lines:
+        selected.append(OMISSION_MARKER)
+    return selected
+
+
+def compact_invoice_text(text: str, token_budget: int = DEFAULT_TOKEN_BUDGET) -> tuple:
+    """
+    Returns (compacted_text, stats) where stats has tokens_before,
+    tokens_after and tokens_saved (estimates, ~4 chars per token).
+    """
+    lines = _drop_noise(_clean_pages(text))
+    compacted = "\n".join(lines)
+    if estimate_tokens(compacted) > token_budget:
+        compacted = "\n".join(_select_lines(lines, token_budget))
+
+    before, after = estimate_tokens(text or ""), estimate_tokens(compacted)
+    return compacted, {"tokens_before": before, "tokens_after": after, "tokens_saved": before - after}
@@ -0,0 +1,130 @@
+import sqlite3
+from datetime import date, timedelta
+
+# Pre-aggregated summary tables kept in sync with `invoices` by triggers, so
+# every writer (extract_ai.save_to_db, db_insert bulk loads, status updates)
+# maintains them without extra code. Missing keys are stored as ''.
+
+ROLLUP_TABLES = {
+    "spend_daily": ("vendor", "day"),
+    "spend_monthly": ("vendor", "month"),
+    "status_summary": ("status",),
+    "due_summary": ("due_date", "status"),
+}
+
+# SQL expressions per rollup key, written against a trigger row alias (NEW/OLD)
+KEY_EXPR = {
+    "vendor": "COALESCE({r}.vendor, '')",
+    "day": "COALESCE(date({r}.issue_date), '')",
+    "month": "COALESCE(strftime('%Y-%m', {r}.issue_date), '')",
+    "status": "COALESCE({r}.status, '')",
+    "due_date": "COALESCE(date({r}.due_date), '')",
+}
+
+DUE_BUCKETS = ["Overdue", "Due in 7 Days", "Due in 30 Days", "Later", "No Due Date"]
+
+#SCHEMA
+
+def _add_sql(table: str, keys: tuple, row: str, sign: int) -> str:
+    """Upsert statement adding (sign=1) or removing (sign=-1) one invoice row."""
+    key_cols = ", ".join(keys)
+    key_vals = ", ".join(KEY_EXPR[k].format(r=row) for k in keys)
+    return f'''
+        INSERT INTO {table} ({key_cols}, invoice_count, total_amount)
+        VALUES ({key_vals}, {sign}, {sign} * COALESCE({row}.amount, 0))
+        ON CONFLICT ({key_cols}) DO UPDATE SET
+            invoice_count = invoice_count + excluded.invoice_count,
+            total_amount = total_amount + excluded.total_amount;
+    '''
+
+
+def _prune_sql(table: str) -> str:
+    return f"DELETE FROM {table} WHERE invoice_count <= 0;"
+
+
+def ensure_rollups(conn):
+    """Creates the rollup tables and triggers; backfills them on first creation."""
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    for table, keys in ROLLUP_TABLES.items():
+        key_defs = ", ".join(f"{k} TEXT NOT NULL" for k in keys)
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                {key_defs},
+                invoice_count INTEGER NOT NULL DEFAULT 0,
+                total_amount REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY ({", ".join(keys)})
+            )
+        ''')
+
+    inserts = "".join(_add_sql(t, k, "NEW", 1) for t, k in ROLLUP_TABLES.items())
+    deletes = "".join(_add_sql(t, k, "OLD", -1) for t, k in ROLLUP_TABLES.items())
+    prunes = "".join(_prune_sql(t) for t in ROLLUP_TABLES)
+
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON invoices BEGIN {inserts} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON invoices BEGIN {deletes} {prunes} END")
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+        AFTER UPDATE OF vendor, amount, issue_date, due_date, status ON invoices
+        BEGIN {deletes} {inserts} {prunes} END
+    ''')
+
+    if not set(ROLLUP_TABLES) <= existing:
+        rebuild_rollups(conn)
+
+
+def rebuild_rollups(conn):
+    """Recomputes every rollup table from the raw invoices rows."""
+    for table, keys in ROLLUP_TABLES.items():
+        key_cols = ", ".join(keys)
+        key_vals = ", ".join(KEY_EXPR[k].format(r="invoices") for k in keys)
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f'''
+            INSERT INTO {table} ({key_cols}, invoice_count, total_amount)
+            SELECT {key_vals}, COUNT(*), COALESCE(SUM(amount), 0)
+            FROM invoices GROUP BY {key_vals}
+        ''')
+
+#QUERIES
+
+def vendor_spend(conn, start_month: str = None, end_month: str = None) -> list:
+    """[(vendor, invoice_count, total_amount)] optionally limited to a 'YYYY-MM' range."""
+    return conn.execute('''
+        SELECT vendor, SUM(invoice_count), SUM(total_amount) FROM spend_monthly
+        WHERE vendor != '' AND (? IS NULL OR month >= ?) AND (? IS NULL OR month <= ?)
+        GROUP BY vendor ORDER BY SUM(total_amount)
+    ''', (start_month, start_month, end_month, end_month)).fetchall()
+
+
+def status_summary(conn) -> list:
+    """[(status, invoice_count, total_amount)]"""
+    return conn.execute(
+        "SELECT status, invoice_count, total_amount FROM status_summary ORDER BY invoice_count DESC"
+    ).fetchall()
+
+
+def due_buckets(conn, today: date = None) -> list:
+    """[(bucket, invoice_count, total_amount)] for unpaid invoices by days until due, in DUE_BUCKETS order."""
+    today = today or date.today()
+    bounds = [today.isoformat(), (today + timedelta(days=7)).isoformat(), (today + timedelta(days=30)).isoformat()]
+    rows = conn.execute('''
+        SELECT CASE
+                   WHEN due_date = '' THEN 'No Due Date'
+                   WHEN due_date < ? THEN 'Overdue'
+                   WHEN due_date <= ? THEN 'Due in 7 Days'
+                   WHEN due_date <= ? THEN 'Due in 30 Days'
+                   ELSE 'Later'
+               END AS bucket,
+               SUM(invoice_count), SUM(total_amount)
+        FROM due_summary WHERE status != 'Paid'
+        GROUP BY bucket
+    ''', bounds).fetchall()
+    return sorted(rows, key=lambda r: DUE_BUCKETS.index(r[0]))
+
+
+if __name__ == "__main__":
+    from init_db import DB_PATH
+    with sqlite3.connect(DB_PATH) as conn:
+        ensure_rollups(conn)
+        rebuild_rollups(conn)
+    print(f"✅ Rollups rebuilt in: {DB_PATH}")
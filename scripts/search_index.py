@@ -0,0 +1,115 @@
+import re
+import sqlite3
+
+# SQLite FTS5 index over invoices (external content table, so the text is not
+# stored twice). Triggers keep it in sync with every insert/update/delete.
+
+FTS_COLUMNS = ["vendor", "invoice_id", "location", "items"]
+
+#SCHEMA
+
+def ensure_search_index(conn):
+    """Creates the FTS5 index, vendor lookup table and sync triggers."""
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    cols = ", ".join(FTS_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS invoices_fts USING fts5(
+            {cols}, content='invoices', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    # Distinct vendor names for typeahead (prefix search via the vendor index)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendor_names (
+            vendor TEXT PRIMARY KEY COLLATE NOCASE,
+            invoice_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_fts_insert AFTER INSERT ON invoices BEGIN
+            INSERT INTO invoices_fts (rowid, {cols}) VALUES (new.id, {new_vals});
+            INSERT INTO vendor_names (vendor, invoice_count) SELECT new.vendor, 1 WHERE new.vendor IS NOT NULL
+                ON CONFLICT (vendor) DO UPDATE SET invoice_count = invoice_count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_fts_delete AFTER DELETE ON invoices BEGIN
+            INSERT INTO invoices_fts (invoices_fts, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+            UPDATE vendor_names SET invoice_count = invoice_count - 1 WHERE vendor = old.vendor;
+            DELETE FROM vendor_names WHERE invoice_count <= 0;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_fts_update AFTER UPDATE OF {cols} ON invoices BEGIN
+            INSERT INTO invoices_fts (invoices_fts, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+            INSERT INTO invoices_fts (rowid, {cols}) VALUES (new.id, {new_vals});
+            UPDATE vendor_names SET invoice_count = invoice_count - 1 WHERE vendor = old.vendor;
+            INSERT INTO vendor_names (vendor, invoice_count) SELECT new.vendor, 1 WHERE new.vendor IS NOT NULL
+                ON CONFLICT (vendor) DO UPDATE SET invoice_count = invoice_count + 1;
+            DELETE FROM vendor_names WHERE invoice_count <= 0;
+        END
+    ''')
+
+    if "invoices_fts" not in existing or "vendor_names" not in existing:
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Re-indexes every invoice (backfill for databases created before the index)."""
+    conn.execute("INSERT INTO invoices_fts (invoices_fts) VALUES ('rebuild')")
+    conn.execute("DELETE FROM vendor_names")
+    conn.execute('''
+        INSERT INTO vendor_names (vendor, invoice_count)
+        SELECT vendor, COUNT(*) FROM invoices WHERE vendor IS NOT NULL GROUP BY vendor COLLATE NOCASE
+    ''')
+
+#QUERIES
+
+def to_match_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word must match, and the last
+    word matches as a prefix so results update while the user is typing.
+    """
+    terms = re.findall(r"\w+", text or "")
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_invoices(conn, text: str, limit: int = 50) -> list:
+    """Ranked invoice ids (bm25, vendor and invoice id weighted highest)."""
+    query = to_match_query(text)
+    if not query:
+        return []
+    rows = conn.execute('''
+        SELECT rowid FROM invoices_fts WHERE invoices_fts MATCH ?
+        ORDER BY bm25(invoices_fts, 10.0, 10.0, 2.0, 1.0) LIMIT ?
+    ''', (query, limit)).fetchall()
+    return [r[0] for r in rows]
+
+
+def suggest_vendors(conn, prefix: str, limit: int = 20) -> list:
+    """Vendor names starting with `prefix`, most frequent first."""
+    prefix = (prefix or "").strip()
+    if not prefix:
+        return []
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    rows = conn.execute('''
+        SELECT vendor FROM vendor_names WHERE vendor LIKE ? ESCAPE '\\'
+        ORDER BY invoice_count DESC, vendor LIMIT ?
+    ''', (escaped + "%", limit)).fetchall()
+    return [r[0] for r in rows]
+
+
+if __name__ == "__main__":
+    from init_db import DB_PATH
+    with sqlite3.connect(DB_PATH) as conn:
+        ensure_search_index(conn)
+        rebuild_search_index(conn)
+    print(f"✅ Search index rebuilt in: {DB_PATH}")
@@ -0,0 +1,94 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import subprocess
+
+# Cold-start budgets (milliseconds of cumulative import time, as reported by
+# `python -X importtime`). The dashboard entry covers its first render in
+# Streamlit "bare" mode, i.e. every import the script does at top level.
+# Imports run against a seeded scratch database (INVOICE_DB_PATH): importing
+# the dashboard creates/migrates the schema of the database it points at, and
+# an empty one would skip (and in bare mode break) the rendering path.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BUDGETS_MS = {
+    "init_db": 50,
+    "extract_ai": 100,
+    "dashboard": 1500,
+}
+
+SAMPLE_INVOICE = ("INV-0001", "Sample Vendor LLC", 1250.0, "2025-01-05", "2025-02-04",
+                  "['Sample item']", "Dubai", "Pending", "Schedule for Payment")
+
+#MEASUREMENT
+
+def seed_database(db_path: str):
+    """Creates the full schema with one sample invoice (for the dashboard render)."""
+    from init_db import ensure_schema
+
+    with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
+        conn.execute('''
+            INSERT INTO invoices (invoice_id, vendor, amount, issue_date, due_date,
+                                  items, location, status, recommended_action)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', SAMPLE_INVOICE)
+    conn.close()
+
+
+def measure_import(module: str) -> tuple:
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns (total_ms, [(cumulative_ms, package), ...]) where the list holds
+    the module's direct imports, heaviest first.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = os.path.join(scratch, "invoices.db")
+        seed_database(db_path)
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", INVOICE_DB_PATH=db_path)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True,
+        )
+
+    total_us, children = None, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        depth = (len(package) - len(package.lstrip()) - 1) // 2
+        if depth == 0 and package.strip() == module:
+            total_us = int(cumulative)
+            break
+        elif depth == 1:
+            # Children are printed before their parent; keep the latest block
+            children.append((int(cumulative) / 1000, package.strip()))
+        elif depth == 0:
+            children = []
+
+    if result.returncode != 0 or total_us is None:
+        error = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+        raise RuntimeError(f"import {module} failed: {error}")
+    return total_us / 1000, sorted(children, reverse=True)
+
+
+def check_budgets(budgets: dict = BUDGETS_MS, show_top: int = 5) -> bool:
+    ok = True
+    for module, budget in budgets.items():
+        try:
+            total_ms, imports = measure_import(module)
+        except RuntimeError as e:
+            print(f"❌ {module}: {e}")
+            ok = False
+            continue
+        within = total_ms <= budget
+        ok &= within
+        print(f"{'✅' if within else '❌'} {module}: {total_ms:.1f} ms (budget {budget} ms)")
+        for cumulative_ms, package in imports[:show_top]:
+            print(f"      {cumulative_ms:8.1f} ms  {package}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_budgets() else 1)